@@ -19,6 +19,9 @@ import qasync
 from src.bikefit.bikefit import BikeFit
 from widgets import VideoPlayer
 
+# Rate at which frames are handed to BikeFit; the rest are skipped undecoded.
+ANALYSIS_FPS = 10
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -46,6 +49,8 @@ class MainWindow(QMainWindow):
         self.main_layout.addWidget(self.input_player)
 
         self.bikefit = BikeFit()
+        self.input_player.target_fps = ANALYSIS_FPS
+        self.input_player.frame_size = self.bikefit.input_size
         self.input_player.add_listener(self.analise_frame)
         self.input_player.recording_changed.connect(self.on_recording_changed)
 
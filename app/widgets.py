@@ -1,13 +1,19 @@
 import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
-from PySide6.QtCore import Qt, QUrl, Slot, Signal
+from PySide6.QtCore import Qt, QTimer, QUrl, Slot, Signal
+from PySide6.QtGui import QImage
 from PySide6.QtMultimedia import (
     QCamera,
     QMediaPlayer,
     QMediaCaptureSession,
     QMediaDevices,
+    QMediaMetaData,
     QVideoFrame,
+    QVideoFrameFormat,
     QVideoSink,
 )
 from PySide6.QtMultimediaWidgets import QVideoWidget
@@ -19,6 +25,48 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
 )
 
+logger = logging.getLogger(__name__)
+
+# Smallest webcam resolution that is still useful for pose detection.
+MIN_CAMERA_RESOLUTION = (640, 360)
+# Webcam formats slower than this are only used when nothing faster exists.
+MIN_CAMERA_FPS = 25
+
+# Slider drags are coalesced into one seek per this many milliseconds.
+SEEK_DEBOUNCE_MS = 15
+
+# QImage formats that can be read in place, mapped to their bytes per pixel and
+# the cv2 conversion that turns their (little-endian) byte layout into BGR.
+# None means the bytes already are BGR and only need copying out.
+QIMAGE_TO_BGR = {
+    QImage.Format.Format_RGB32: (4, cv2.COLOR_BGRA2BGR),
+    QImage.Format.Format_ARGB32: (4, cv2.COLOR_BGRA2BGR),
+    QImage.Format.Format_ARGB32_Premultiplied: (4, cv2.COLOR_BGRA2BGR),
+    QImage.Format.Format_RGBX8888: (4, cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_RGBA8888: (4, cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_RGB888: (3, cv2.COLOR_RGB2BGR),
+    QImage.Format.Format_BGR888: (3, None),
+}
+
+# Packed QVideoFrame formats that can be read from mapped memory, with the cv2
+# conversion from their byte layout to BGR. NV12 is handled separately.
+VIDEO_FRAME_TO_BGR = {
+    QVideoFrameFormat.PixelFormat.Format_BGRA8888: cv2.COLOR_BGRA2BGR,
+    QVideoFrameFormat.PixelFormat.Format_BGRX8888: cv2.COLOR_BGRA2BGR,
+    QVideoFrameFormat.PixelFormat.Format_RGBA8888: cv2.COLOR_RGBA2BGR,
+    QVideoFrameFormat.PixelFormat.Format_RGBX8888: cv2.COLOR_RGBA2BGR,
+}
+
+
+def fit_size(width, height, max_size):
+    # Size that fits inside max_size keeping the aspect ratio, or None when
+    # the frame already fits.
+    max_width, max_height = max_size
+    scale = min(max_width / width, max_height / height)
+    if scale >= 1:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
 
 class VideoPlayer(QWidget):
     recording_changed = Signal(bool)
@@ -33,6 +81,21 @@ class VideoPlayer(QWidget):
 
         self.is_recording = False
         self.listeners = []
+        self._frame_queues = []
+        self._pumps = []
+        self._pending_frames = None
+        self._converter = None
+        self._convert_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="videoplayer-convert"
+        )
+
+        self.frame_size = None
+        self._target_fps = None
+        self._decode_stride = 1
+        self._frame_tick = 0
+
+        self._fps = 0
+        self._frame_count = 0
 
         self.camera = None
         self.capture_session = QMediaCaptureSession()
@@ -56,33 +119,166 @@ class VideoPlayer(QWidget):
         self.play_button.clicked.connect(self.play_video)
         self.pause_button.clicked.connect(self.pause_video)
         self.record_button.clicked.connect(self.toggle_recording)
-        self.time_slider.sliderMoved.connect(self.set_position)
+        self.time_slider.sliderMoved.connect(self.queue_seek)
+
+        self._pending_seek = None
+        self._seek_timer = QTimer(self)
+        self._seek_timer.setSingleShot(True)
+        self._seek_timer.setInterval(SEEK_DEBOUNCE_MS)
+        self._seek_timer.timeout.connect(self._apply_pending_seek)
 
         self.media_player.positionChanged.connect(self.position_changed)
         self.media_player.durationChanged.connect(self.duration_changed)
+        self.media_player.metaDataChanged.connect(self._read_video_properties)
 
     def add_listener(self, listener):
         self.listeners.append(listener)
 
+    def _start_pumps(self):
+        # Started lazily, the asyncio loop is not running yet when listeners
+        # are added from the window constructor.
+        if self._converter is None:
+            self._pending_frames = asyncio.Queue(maxsize=1)
+            self._converter = asyncio.create_task(self._convert_frames())
+        for listener in self.listeners[len(self._pumps) :]:
+            queue = asyncio.Queue(maxsize=1)
+            self._frame_queues.append(queue)
+            self._pumps.append(asyncio.create_task(self._pump(listener, queue)))
+
+    @staticmethod
+    def _offer(queue, item):
+        # Newest item wins: replace whatever is still waiting in the queue.
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    async def _convert_frames(self):
+        # Frame conversion runs on a worker thread so the UI thread only
+        # queues the (implicitly shared) QVideoFrame and returns.
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await self._pending_frames.get()
+            try:
+                arr = await loop.run_in_executor(
+                    self._convert_executor, self._frame_to_array, frame
+                )
+            except Exception:
+                logger.exception("Frame conversion failed")
+                continue
+            for queue in self._frame_queues:
+                self._offer(queue, arr)
+
+    @staticmethod
+    async def _pump(listener, queue):
+        while True:
+            frame = await queue.get()
+            try:
+                await listener(frame)
+            except Exception:
+                logger.exception("Frame listener failed")
+
+    @property
+    def target_fps(self):
+        return self._target_fps
+
+    @target_fps.setter
+    def target_fps(self, fps):
+        # Listeners only get every Nth frame; the others are never converted.
+        self._target_fps = fps
+        self._update_decode_stride()
+
+    def _update_decode_stride(self):
+        source_fps = self.get_fps()
+        if self._target_fps and source_fps:
+            self._decode_stride = max(1, round(source_fps / self._target_fps))
+        else:
+            self._decode_stride = 1
+        self._frame_tick = 0
+
     def on_frame_changed(self, frame: QVideoFrame):
-        print("on_frame_changed called")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("on_frame_changed called")
         if self.is_recording and frame.isValid():
-            print("Recording and frame is valid")
-            # Map the video frame to get access to the image data
-            image = frame.toImage()
-            if image.format() != image.Format.Format_BGR888:
-                image = image.convertToFormat(image.Format.Format_BGR888)
+            skip = self._frame_tick % self._decode_stride
+            self._frame_tick += 1
+            if skip:
+                return
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Recording and frame is valid")
+
+            # One pending frame per stage; a slow listener only ever sees
+            # the newest frame instead of a growing backlog of tasks.
+            self._start_pumps()
+            self._offer(self._pending_frames, frame)
+
+    def _frame_to_array(self, frame):
+        arr = self._mapped_frame_to_array(frame, self.frame_size)
+        if arr is None:
+            arr = self._image_to_array(frame.toImage(), self.frame_size)
+        return arr
+
+    @staticmethod
+    def _mapped_plane(frame, plane, rows, row_bytes):
+        bytes_per_line = frame.bytesPerLine(plane)
+        data = np.frombuffer(frame.bits(plane), dtype=np.uint8)
+        return data[: rows * bytes_per_line].reshape(rows, bytes_per_line)[:, :row_bytes]
+
+    @classmethod
+    def _mapped_frame_to_array(cls, frame, frame_size=None):
+        # Reads the planes in place instead of going through toImage(), so
+        # the only full-frame pass is the conversion that writes the result.
+        # Returns None for formats (or hardware frames) that cannot be mapped.
+        pixel_format = frame.pixelFormat()
+        is_nv12 = pixel_format == QVideoFrameFormat.PixelFormat.Format_NV12
+        if not is_nv12 and pixel_format not in VIDEO_FRAME_TO_BGR:
+            return None
+        if not frame.map(QVideoFrame.MapMode.ReadOnly):
+            return None
+        try:
+            width, height = frame.width(), frame.height()
+            size = fit_size(width, height, frame_size) if frame_size else None
+            if is_nv12:
+                luma = cls._mapped_plane(frame, 0, height, width)
+                chroma = cls._mapped_plane(frame, 1, height // 2, width)
+                chroma = chroma.reshape(height // 2, width // 2, 2)
+                bgr = cv2.cvtColorTwoPlane(luma, chroma, cv2.COLOR_YUV2BGR_NV12)
+                if size is not None:
+                    bgr = cv2.resize(bgr, size, interpolation=cv2.INTER_AREA)
+                return bgr
 
-            # Create a copy of the data to avoid issues with the buffer
-            ptr = image.bits()
-            ptr.setsize(image.sizeInBytes())
-            arr = np.array(ptr).reshape(image.height(), image.width(), 3).copy()
+            pixels = cls._mapped_plane(frame, 0, height, width * 4)
+            pixels = pixels.reshape(height, width, 4)
+            if size is not None:
+                pixels = cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(pixels, VIDEO_FRAME_TO_BGR[pixel_format])
+        finally:
+            frame.unmap()
 
-            for listener in self.listeners:
-                asyncio.create_task(listener(arr))
+    @staticmethod
+    def _image_to_array(image, frame_size=None):
+        layout = QIMAGE_TO_BGR.get(image.format())
+        if layout is None:
+            image = image.convertToFormat(QImage.Format.Format_RGB32)
+            layout = QIMAGE_TO_BGR[QImage.Format.Format_RGB32]
+        channels, code = layout
+
+        # View the QImage memory without copying (rows may be padded) and
+        # produce the BGR array in a single pass. Downscaling happens first so
+        # the color conversion only touches the smaller image.
+        height, width = image.height(), image.width()
+        bytes_per_line = image.bytesPerLine()
+        pixels = np.frombuffer(image.constBits(), dtype=np.uint8)
+        pixels = pixels[: height * bytes_per_line].reshape(height, bytes_per_line)
+        pixels = pixels[:, : width * channels].reshape(height, width, channels)
+        size = fit_size(width, height, frame_size) if frame_size else None
+        if size is not None:
+            pixels = cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
+        if code is None:
+            return pixels if size is not None else pixels.copy()
+        return cv2.cvtColor(pixels, code)
 
     def toggle_recording(self):
-        print("toggle_recording called")
+        logger.debug("toggle_recording called")
         self.is_recording = not self.is_recording
         if self.is_recording:
             self.record_button.setText("Stop")
@@ -104,7 +300,10 @@ class VideoPlayer(QWidget):
         self.media_player.setVideoSink(self.video_sink)
         self.media_player.setVideoOutput(self.video_widget)
         self.source_type = "file"
+        self._fps = 0
+        self._frame_count = 0
         self.media_player.setSource(QUrl.fromLocalFile(file_name))
+        self._update_decode_stride()
         self.play_button.setEnabled(True)
         self.time_slider.setEnabled(True)
         self.media_player.play()
@@ -116,20 +315,55 @@ class VideoPlayer(QWidget):
         self.media_player.setVideoSink(None)
         self.media_player.stop()
         self.media_player.setSource(QUrl())
+        self._fps = 0
+        self._frame_count = 0
         self.capture_session.setVideoSink(self.video_sink)
         self.capture_session.setVideoOutput(self.video_widget)
         self.source_type = "webcam"
         available_cameras = QMediaDevices.videoInputs()
         if not available_cameras:
-            print("No webcam found.")
+            logger.warning("No webcam found.")
             return
 
         self.camera = QCamera(available_cameras[0])
+        camera_format = self._pick_camera_format(available_cameras[0])
+        if camera_format is not None:
+            self.camera.setCameraFormat(camera_format)
         self.capture_session.setCamera(self.camera)
+        self._update_decode_stride()
         self.play_button.setEnabled(True)
         self.time_slider.setEnabled(False)
         self.camera.start()
 
+    @staticmethod
+    def _pick_camera_format(camera_device):
+        # Lowest usable resolution keeps the driver queue and per-frame copies
+        # small; MJPEG is preferred because it is the cheapest format to ingest.
+        # Slow modes are ruled out first, or a 5 fps MJPEG mode would starve
+        # the analysis; if every mode is slow, the fastest one is used.
+        min_width, min_height = MIN_CAMERA_RESOLUTION
+        formats = [
+            fmt
+            for fmt in camera_device.videoFormats()
+            if fmt.resolution().width() >= min_width
+            and fmt.resolution().height() >= min_height
+        ]
+        if not formats:
+            return None
+        fast_formats = [
+            fmt for fmt in formats if fmt.maxFrameRate() >= MIN_CAMERA_FPS
+        ]
+        if not fast_formats:
+            return max(formats, key=lambda fmt: fmt.maxFrameRate())
+        return min(
+            fast_formats,
+            key=lambda fmt: (
+                fmt.pixelFormat() != QVideoFrameFormat.PixelFormat.Format_Jpeg,
+                fmt.resolution().width() * fmt.resolution().height(),
+                -fmt.maxFrameRate(),
+            ),
+        )
+
     def play_video(self):
         if self.source_type == "file":
             self.media_player.play()
@@ -146,6 +380,16 @@ class VideoPlayer(QWidget):
         if self.source_type == "file":
             self.media_player.setPosition(position)
 
+    def queue_seek(self, position):
+        # Only the latest position of a drag is seeked to.
+        self._pending_seek = position
+        self._seek_timer.start()
+
+    def _apply_pending_seek(self):
+        if self._pending_seek is not None:
+            self.set_position(self._pending_seek)
+            self._pending_seek = None
+
     def position_changed(self, position):
         if self.source_type == "file":
             self.time_slider.setValue(position)
@@ -153,34 +397,43 @@ class VideoPlayer(QWidget):
     def duration_changed(self, duration):
         if self.source_type == "file":
             self.time_slider.setRange(0, duration)
+            self._read_video_properties()
 
     def set_frame(self, frame_number):
         # This method might need adjustment depending on how you want to sync
         # with the analyzed video. For now, it seeks based on milliseconds.
-        if self.source_type == "file" and self.media_player.duration() > 0:
-            position = (
-                frame_number
-                / self.get_frame_count()
-                * self.media_player.duration()
-            )
-            self.set_position(int(position))
+        if (
+            self.source_type == "file"
+            and self.media_player.duration() > 0
+            and self.get_frame_count() > 0
+        ):
+            frame_duration = self.media_player.duration() / self.get_frame_count()
+            position = frame_number * frame_duration
+            # Seeking onto the frame already being shown would only re-decode
+            # from the previous keyframe.
+            if abs(position - self.media_player.position()) >= frame_duration:
+                self.set_position(int(position))
         return None  # Returning None as we can't easily get the frame data here
 
+    def _read_video_properties(self):
+        # QMediaPlayer has already parsed the container; reuse its metadata
+        # rather than opening the file a second time with cv2.
+        if self.source_type != "file":
+            return
+        fps = self.media_player.metaData().value(QMediaMetaData.Key.VideoFrameRate)
+        self._fps = float(fps) if fps else 0
+        self._frame_count = round(self.media_player.duration() / 1000 * self._fps)
+        self._update_decode_stride()
+
     def get_frame_count(self):
         # This is an approximation. A more accurate way might be needed.
         if self.source_type == "file":
-            video_capture = cv2.VideoCapture(
-                self.media_player.source().toLocalFile()
-            )
-            if video_capture.isOpened():
-                return int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            return self._frame_count
         return 0
 
     def get_fps(self):
         if self.source_type == "file":
-            video_capture = cv2.VideoCapture(
-                self.media_player.source().toLocalFile()
-            )
-            if video_capture.isOpened():
-                return video_capture.get(cv2.CAP_PROP_FPS)
+            return self._fps
+        elif self.source_type == "webcam" and self.camera:
+            return self.camera.cameraFormat().maxFrameRate()
         return 0
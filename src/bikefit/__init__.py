@@ -1,4 +1,5 @@
-from .analysis import Analysis
+from .analysis import ANGLE_NAMES, JOINT_NAMES, Analysis
 from .bikefit import BikeFit
+from .pool import BikeFitPool
 
-__all__ = ["BikeFit", "Analysis"]
+__all__ = ["ANGLE_NAMES", "JOINT_NAMES", "BikeFit", "BikeFitPool", "Analysis"]
@@ -0,0 +1,34 @@
+"""
+Small numeric kernels used on the per-frame hot path.
+
+They are compiled with Numba when it is installed, e.g. through the `fast`
+extra (`pip install bikefit[fast]`). Without it they run as plain Python
+loops, which for the handful of points of a frame is still cheaper than the
+per-call overhead of the equivalent NumPy expressions.
+"""
+
+import math
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def angles_batch(a, b, c, out):
+    """
+    Writes to `out` the angles (in degrees) at the points of `b` formed with
+    the points of `a` and `c`. `a`, `b` and `c` are (N, 2) arrays and `out`
+    has N elements. Returns `out`.
+    """
+    for i in range(a.shape[0]):
+        radians = math.atan2(c[i, 1] - b[i, 1], c[i, 0] - b[i, 0]) - math.atan2(a[i, 1] - b[i, 1], a[i, 0] - b[i, 0])
+        angle = abs(radians) * 57.29577951308232
+        out[i] = 360.0 - angle if angle > 180.0 else angle
+    return out
@@ -1,26 +1,151 @@
 """Data class for storing analysis results."""
 
+import sys
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
+from typing import Dict, Tuple
 
+import numpy as np
 
-@dataclass
+JOINT_NAMES = (
+    "left_shoulder",
+    "left_elbow",
+    "left_wrist",
+    "left_hip",
+    "left_knee",
+    "left_ankle",
+    "right_shoulder",
+    "right_elbow",
+    "right_wrist",
+    "right_hip",
+    "right_knee",
+    "right_ankle",
+)
+"""Names of the tracked joints, in the order they are stored."""
+
+ANGLE_NAMES = ("left_elbow", "left_knee", "right_elbow", "right_knee")
+"""Names of the calculated angles, in the order they are stored."""
+
+
+def _empty_joints(frame_count: int) -> np.ndarray:
+    return np.full((frame_count, len(JOINT_NAMES), 3), np.nan, dtype=np.float32)
+
+
+def _empty_angles(frame_count: int) -> np.ndarray:
+    return np.full((frame_count, len(ANGLE_NAMES)), np.nan, dtype=np.float32)
+
+
+# Slotted dataclasses need Python 3.10+; older versions keep a __dict__.
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Analysis:
     """Holds the results of a bike fit analysis session."""
 
     frame_count: int = 0
     """Total number of frames processed."""
 
-    joints: Dict[int, Dict[str, Tuple[float, float, float]]] = field(default_factory=dict)
+    joints_xyv: np.ndarray = field(default_factory=lambda: _empty_joints(0), compare=False)
     """
-    A dictionary where keys are frame numbers and values are dictionaries
-    of joint data. The inner dictionary maps joint names (str) to a tuple
-    of (x, y, visibility).
+    A float32 array of shape (frames, len(JOINT_NAMES), 3) indexed by frame
+    number, holding (x, y, visibility) for each joint. Frames without a
+    detection, and spare capacity at the end, are NaN.
     """
 
-    angles: Dict[int, Dict[str, float]] = field(default_factory=dict)
+    angle_values: np.ndarray = field(default_factory=lambda: _empty_angles(0), compare=False)
     """
-    A dictionary where keys are frame numbers and values are dictionaries
-    of angle data. The inner dictionary maps angle names (str) to their
-    calculated values (float).
+    A float32 array of shape (frames, len(ANGLE_NAMES)) indexed by frame
+    number, holding each angle in degrees. Frames without a detection, and
+    spare capacity at the end, are NaN.
     """
+
+    def __eq__(self, other):
+        # The generated __eq__ would compare the arrays element-wise
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.frame_count == other.frame_count
+            and np.array_equal(self.joints_xyv, other.joints_xyv, equal_nan=True)
+            and np.array_equal(self.angle_values, other.angle_values, equal_nan=True)
+        )
+
+    @classmethod
+    def allocate(cls, frame_count: int) -> "Analysis":
+        """Creates an empty analysis with room for `frame_count` frames."""
+        return cls(joints_xyv=_empty_joints(frame_count), angle_values=_empty_angles(frame_count))
+
+    def update(
+        self,
+        frame_number: int,
+        frame_joints: Dict[str, Tuple[float, float, float]],
+        frame_angles: Dict[str, float],
+    ) -> None:
+        """
+        Stores the joints and angles of one frame, as returned by
+        `BikeFit.analise_cyclist_frame`.
+        """
+        self._reserve(frame_number + 1)
+        for index, name in enumerate(JOINT_NAMES):
+            if name in frame_joints:
+                self.joints_xyv[frame_number, index] = frame_joints[name]
+        for index, name in enumerate(ANGLE_NAMES):
+            if name in frame_angles:
+                self.angle_values[frame_number, index] = frame_angles[name]
+        self.frame_count += 1
+
+    def append(self, frame_number: int, joints_row: np.ndarray, angles_row: np.ndarray) -> None:
+        """
+        Stores one frame given as rows in JOINT_NAMES / ANGLE_NAMES order.
+        The arrays grow by doubling, so sources of unknown length (e.g. a
+        webcam) can be recorded without preallocating.
+        """
+        self._reserve(frame_number + 1)
+        self.joints_xyv[frame_number] = joints_row
+        self.angle_values[frame_number] = angles_row
+        self.frame_count += 1
+
+    def _reserve(self, frames: int) -> None:
+        capacity = len(self.joints_xyv)
+        if frames <= capacity:
+            return
+        capacity = max(frames, 2 * capacity)
+        joints_xyv = _empty_joints(capacity)
+        joints_xyv[: len(self.joints_xyv)] = self.joints_xyv
+        angle_values = _empty_angles(capacity)
+        angle_values[: len(self.angle_values)] = self.angle_values
+        self.joints_xyv = joints_xyv
+        self.angle_values = angle_values
+
+    @property
+    def joints(self) -> Dict[int, Dict[str, Tuple[float, float, float]]]:
+        """
+        A dictionary where keys are frame numbers and values are dictionaries
+        of joint data. The inner dictionary maps joint names (str) to a tuple
+        of (x, y, visibility). Built from `joints_xyv` on each access.
+        """
+        detected = ~np.isnan(self.joints_xyv[:, :, 0])
+        return {
+            int(frame_number): {
+                name: tuple(float(value) for value in self.joints_xyv[frame_number, index])
+                for index, name in enumerate(JOINT_NAMES)
+                if detected[frame_number, index]
+            }
+            for frame_number in np.flatnonzero(detected.any(axis=1))
+        }
+
+    @property
+    def angles(self) -> Dict[int, Dict[str, float]]:
+        """
+        A dictionary where keys are frame numbers and values are dictionaries
+        of angle data. The inner dictionary maps angle names (str) to their
+        calculated values (float). Built from `angle_values` on each access.
+        """
+        detected = ~np.isnan(self.angle_values)
+        return {
+            int(frame_number): {
+                name: float(self.angle_values[frame_number, index])
+                for index, name in enumerate(ANGLE_NAMES)
+                if detected[frame_number, index]
+            }
+            for frame_number in np.flatnonzero(detected.any(axis=1))
+        }
@@ -3,15 +3,65 @@ This module contains the main BikeFit class for analyzing bike fitting videos.
 """
 
 import asyncio
-import threading
-import time
-from typing import Optional
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
 
 import cv2
 import mediapipe as mp
 import numpy as np
 
-from bikefit.analysis import Analysis
+from bikefit._kernels import angles_batch
+from bikefit.analysis import ANGLE_NAMES, JOINT_NAMES
+
+logger = logging.getLogger(__name__)
+
+_PL = mp.solutions.pose.PoseLandmark
+_L_SHOULDER = _PL.LEFT_SHOULDER.value
+_L_ELBOW = _PL.LEFT_ELBOW.value
+_L_WRIST = _PL.LEFT_WRIST.value
+_L_HIP = _PL.LEFT_HIP.value
+_L_KNEE = _PL.LEFT_KNEE.value
+_L_ANKLE = _PL.LEFT_ANKLE.value
+_R_SHOULDER = _PL.RIGHT_SHOULDER.value
+_R_ELBOW = _PL.RIGHT_ELBOW.value
+_R_WRIST = _PL.RIGHT_WRIST.value
+_R_HIP = _PL.RIGHT_HIP.value
+_R_KNEE = _PL.RIGHT_KNEE.value
+_R_ANKLE = _PL.RIGHT_ANKLE.value
+
+_JOINT_PLAN = (
+    ("left_shoulder", _L_SHOULDER),
+    ("left_elbow", _L_ELBOW),
+    ("left_wrist", _L_WRIST),
+    ("left_hip", _L_HIP),
+    ("left_knee", _L_KNEE),
+    ("left_ankle", _L_ANKLE),
+    ("right_shoulder", _R_SHOULDER),
+    ("right_elbow", _R_ELBOW),
+    ("right_wrist", _R_WRIST),
+    ("right_hip", _R_HIP),
+    ("right_knee", _R_KNEE),
+    ("right_ankle", _R_ANKLE),
+)
+
+JOINT_IDX = dict(_JOINT_PLAN)
+"""Maps each tracked joint name to its MediaPipe pose landmark index."""
+
+# Landmarks (first, mid, end) whose angle at the mid point is measured
+_ANGLE_PLAN = {
+    "left_elbow": (_L_SHOULDER, _L_ELBOW, _L_WRIST),
+    "left_knee": (_L_HIP, _L_KNEE, _L_ANKLE),
+    "right_elbow": (_R_SHOULDER, _R_ELBOW, _R_WRIST),
+    "right_knee": (_R_HIP, _R_KNEE, _R_ANKLE),
+}
+
+# Gather indices into the landmark array, in the order of JOINT_NAMES and
+# ANGLE_NAMES, so a frame is extracted with a handful of fancy indexings
+_JOINT_INDICES = np.array([JOINT_IDX[name] for name in JOINT_NAMES], dtype=np.intp)
+_ANGLE_A_IDX, _ANGLE_B_IDX, _ANGLE_C_IDX = (
+    np.array(indices, dtype=np.intp) for indices in zip(*(_ANGLE_PLAN[name] for name in ANGLE_NAMES))
+)
 
 
 class BikeFit:
@@ -19,33 +69,63 @@ class BikeFit:
     A class to analyze bike fitting videos, detect human joints, and calculate angles.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        input_size: Tuple[int, int] = (640, 360),
+        model_complexity: int = 1,
+        smooth_landmarks: bool = True,
+        min_detection_confidence: float = 0.5,
+        min_tracking_confidence: float = 0.5,
+        use_opencl: bool = False,
+    ):
         """
         Initializes the BikeFit analyzer.
+
+        Args:
+            input_size: Maximum (width, height) of the frames given to the pose
+                model. Larger frames are downscaled, keeping their aspect ratio.
+            model_complexity: MediaPipe Pose model to use: 0 (lite), 1 (full)
+                or 2 (heavy). The lite model is about twice as fast as the full
+                one and is usually enough for a stationary cyclist, but only
+                the full model ships with MediaPipe; the others are downloaded
+                into its package directory the first time they are used.
+            smooth_landmarks: Whether MediaPipe filters landmarks across frames.
+            min_detection_confidence: Minimum confidence for a person detection.
+            min_tracking_confidence: Minimum confidence to keep tracking the
+                landmarks instead of detecting again. Lower values save CPU.
+            use_opencl: Whether to resize and color convert frames through
+                OpenCV's OpenCL path (T-API), when OpenCL is available. This
+                frees CPU for MediaPipe on large frames, but the upload and
+                download usually cost more than they save at small sizes.
         """
         # Initialize MediaPipe Pose
         self.mp_pose = mp.solutions.pose
         self.pose = self.mp_pose.Pose(
             static_image_mode=False,
-            model_complexity=1,
-            smooth_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
+            model_complexity=model_complexity,
+            smooth_landmarks=smooth_landmarks,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
         )
-
-    def _calculate_angle(self, a, b, c):
-        """Calculates the angle between three points (in degrees)."""
-        a = np.array(a)  # First
-        b = np.array(b)  # Mid
-        c = np.array(c)  # End
-
-        radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-
-        if angle > 180.0:
-            angle = 360 - angle
-
-        return angle
+        # Pose models run on small inputs; larger frames only cost conversion
+        # time, so callers may already downscale to fit this (width, height).
+        self.input_size = input_size
+        # RGB copy of the frame handed to MediaPipe, reused across frames
+        self._rgb_buf = None
+        self._use_opencl = use_opencl and cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        # A single, persistent worker thread keeps the pose graph on one thread
+        # and avoids going through the shared default executor on every frame.
+        # Started on the first async call, so synchronous users never pay for it.
+        self._executor = None
+
+    def close(self):
+        """
+        Waits for pending frames, then releases the worker thread and the
+        MediaPipe graph.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.pose.close()
 
     async def analise_cyclist_frame(self, frame):
         """
@@ -59,108 +139,85 @@ class BikeFit:
             - frame_joints: Joint data for the frame.
             - frame_angles: Angle data for the frame.
         """
-        return await asyncio.to_thread(self._process_frame, frame)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._process_frame, frame)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bikefit-pose")
+        return self._executor
 
     def _process_frame(self, frame):
         """
         The synchronous part of the frame analysis.
         """
-        # Convert the BGR image to RGB
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_joints = {}
+        frame_angles = {}
+
+        rows = self.process_frame_rows(frame)
+        if rows is not None:
+            joint_rows, angle_row = rows
+            frame_joints.update(zip(JOINT_NAMES, map(tuple, joint_rows.tolist())))
+            frame_angles.update(zip(ANGLE_NAMES, angle_row.tolist()))
+
+        return frame_joints, frame_angles
+
+    def process_frame_rows(self, frame):
+        """
+        Synchronously analyzes a frame like `analise_cyclist_frame`, but
+        returns packed float32 arrays instead of dictionaries: the joints as a
+        (len(JOINT_NAMES), 3) array of (x, y, visibility) and the angles in
+        ANGLE_NAMES order. Returns None when no pose is detected.
+        """
+        # Downscale large frames; landmarks are normalized, so nothing needs
+        # to be scaled back afterwards
+        height, width = frame.shape[:2]
+        scale = min(self.input_size[0] / width, self.input_size[1] / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale))) if scale < 1 else None
+
+        if self._use_opencl:
+            # Resize and convert on the OpenCL device; MediaPipe needs the
+            # result back in host memory
+            umat = cv2.UMat(frame)
+            if size is not None:
+                umat = cv2.resize(umat, size, interpolation=cv2.INTER_AREA)
+            image = cv2.cvtColor(umat, cv2.COLOR_BGR2RGB).get()
+        else:
+            if size is not None:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+            # Convert the BGR image to RGB into the reused buffer
+            if self._rgb_buf is None or self._rgb_buf.shape != frame.shape:
+                self._rgb_buf = np.empty(frame.shape, dtype=np.uint8)
+            self._rgb_buf.flags.writeable = True
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
         image.flags.writeable = False
 
         # Process the image and find pose
         results = self.pose.process(image)
 
-        image.flags.writeable = True
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-        frame_joints = {}
-        frame_angles = {}
+        if results.pose_landmarks is None:
+            logger.debug("No pose detected in frame")
+            return None
 
         # Extract landmarks
-        try:
-            landmarks = results.pose_landmarks.landmark
-            
-            # Get coordinates
-            left_shoulder = [
-                landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].y,
-            ]
-            left_elbow = [
-                landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW.value].y,
-            ]
-            left_wrist = [
-                landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST.value].y,
-            ]
-            left_hip = [
-                landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value].y,
-            ]
-            left_knee = [
-                landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value].y,
-            ]
-            left_ankle = [
-                landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-                landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value].y,
-            ]
-
-            right_shoulder = [
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y,
-            ]
-            right_elbow = [
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW.value].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW.value].y,
-            ]
-            right_wrist = [
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST.value].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST.value].y,
-            ]
-            right_hip = [
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value].y,
-            ]
-            right_knee = [
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value].y,
-            ]
-            right_ankle = [
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value].x,
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value].y,
-            ]
-
-            # Store joint data
-            frame_joints["left_shoulder"] = (left_shoulder[0], left_shoulder[1], landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].visibility)
-            frame_joints["left_elbow"] = (left_elbow[0], left_elbow[1], landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW.value].visibility)
-            frame_joints["left_wrist"] = (left_wrist[0], left_wrist[1], landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST.value].visibility)
-            frame_joints["left_hip"] = (left_hip[0], left_hip[1], landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value].visibility)
-            frame_joints["left_knee"] = (left_knee[0], left_knee[1], landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value].visibility)
-            frame_joints["left_ankle"] = (left_ankle[0], left_ankle[1], landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value].visibility)
-
-            frame_joints["right_shoulder"] = (right_shoulder[0], right_shoulder[1], landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].visibility)
-            frame_joints["right_elbow"] = (right_elbow[0], right_elbow[1], landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW.value].visibility)
-            frame_joints["right_wrist"] = (right_wrist[0], right_wrist[1], landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST.value].visibility)
-            frame_joints["right_hip"] = (right_hip[0], right_hip[1], landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value].visibility)
-            frame_joints["right_knee"] = (right_knee[0], right_knee[1], landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value].visibility)
-            frame_joints["right_ankle"] = (right_ankle[0], right_ankle[1], landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value].visibility)
-
-            # Calculate angles
-            left_elbow_angle = self._calculate_angle(left_shoulder, left_elbow, left_wrist)
-            left_knee_angle = self._calculate_angle(left_hip, left_knee, left_ankle)
-            right_elbow_angle = self._calculate_angle(right_shoulder, right_elbow, right_wrist)
-            right_knee_angle = self._calculate_angle(right_hip, right_knee, right_ankle)
-
-            frame_angles["left_elbow"] = left_elbow_angle
-            frame_angles["left_knee"] = left_knee_angle
-            frame_angles["right_elbow"] = right_elbow_angle
-            frame_angles["right_knee"] = right_knee_angle
-
-        except Exception as e:
-            # Landmark not found or other error
-            pass
-
-        return frame_joints, frame_angles
+        landmarks = results.pose_landmarks.landmark
+
+        # Copy every landmark once instead of reading attributes joint by joint
+        landmark_arr = np.fromiter(
+            (value for landmark in landmarks for value in (landmark.x, landmark.y, landmark.visibility)),
+            dtype=np.float32,
+            count=len(landmarks) * 3,
+        ).reshape(-1, 3)
+
+        # Gather every tracked joint in one indexing
+        joint_rows = landmark_arr[_JOINT_INDICES]
+
+        # Calculate angles, in the order of ANGLE_NAMES
+        first = landmark_arr[_ANGLE_A_IDX, :2]
+        mid = landmark_arr[_ANGLE_B_IDX, :2]
+        end = landmark_arr[_ANGLE_C_IDX, :2]
+        # A fresh output per frame, so callers can keep the rows they get
+        angle_row = angles_batch(first, mid, end, np.empty(len(ANGLE_NAMES), dtype=np.float32))
+
+        return joint_rows, angle_row
@@ -0,0 +1,145 @@
+"""
+This module contains the BikeFitPool class for analyzing several videos in parallel.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+from bikefit.analysis import Analysis
+from bikefit.bikefit import BikeFit
+
+logger = logging.getLogger(__name__)
+
+
+class BikeFitPool:
+    """
+    Analyzes several videos in parallel, each one on its own BikeFit instance.
+
+    A MediaPipe Pose graph processes one frame at a time, so throughput scales
+    by running independent graphs side by side. Workers are threads rather
+    than processes because the graphs cannot be pickled, and MediaPipe
+    releases the GIL while it runs.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, realtime: bool = False, **bikefit_options):
+        """
+        Initializes the pool and starts its worker threads.
+
+        Args:
+            n_workers: Number of videos analyzed at the same time. Defaults to
+                half the CPU count.
+            realtime: Whether the sources are live (e.g. stream URLs). Frames
+                that arrive while the previous one is analyzed are then skipped
+                with grab(), which spares their color conversion and copy,
+                instead of building up a backlog.
+            **bikefit_options: Keyword arguments for each BikeFit instance.
+        """
+        if n_workers is None:
+            n_workers = max(1, (os.cpu_count() or 2) // 2)
+        self._realtime = realtime
+        self._bikefit_options = bikefit_options
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._results: Dict[str, Analysis] = {}
+        self._workers = [threading.Thread(target=self._worker_loop, daemon=True) for _ in range(n_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, video_path: str, callback: Optional[Callable[[str, Analysis], None]] = None):
+        """
+        Queues a video for analysis.
+
+        Args:
+            video_path: Path of the video file to analyze.
+            callback: Optional function called from the worker thread with the
+                video path and its Analysis once the video is done.
+        """
+        self._queue.put((video_path, callback))
+
+    def get_analysis(self, video_path: str) -> Optional[Analysis]:
+        """
+        Returns a snapshot of the Analysis of a video, which may still be in
+        progress, or None if its analysis has not started.
+        """
+        with self._lock:
+            analysis = self._results.get(video_path)
+            if analysis is None:
+                return None
+            return Analysis(analysis.frame_count, analysis.joints_xyv.copy(), analysis.angle_values.copy())
+
+    def join(self):
+        """Blocks until every submitted video has been analyzed."""
+        self._queue.join()
+
+    def close(self):
+        """Finishes the queued videos and stops the worker threads."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                video_path, callback = item
+                # A fresh graph per video keeps tracking and smoothing state
+                # from leaking between videos.
+                bikefit = BikeFit(**self._bikefit_options)
+                try:
+                    analysis = self._analyse_video(bikefit, video_path)
+                finally:
+                    bikefit.close()
+                if callback is not None:
+                    callback(video_path, analysis)
+            except Exception:
+                logger.exception("Failed to analyze %s", item[0])
+            finally:
+                self._queue.task_done()
+
+    def _analyse_video(self, bikefit: BikeFit, video_path: str) -> Analysis:
+        video_capture = cv2.VideoCapture(video_path)
+        if not video_capture.isOpened():
+            raise OSError(video_path)
+
+        # Live sources report a negative frame count; append() grows the arrays
+        analysis = Analysis.allocate(max(0, int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))))
+        with self._lock:
+            self._results[video_path] = analysis
+        fps = video_capture.get(cv2.CAP_PROP_FPS)
+        frame_period = 1.0 / fps if self._realtime and fps > 0 else 0.0
+        try:
+            frame_number = 0
+            skip = 0
+            while True:
+                # grab() still decodes, but skips the retrieve() conversion and copy
+                for _ in range(skip):
+                    if not video_capture.grab():
+                        break
+                    frame_number += 1
+                ret, frame = video_capture.read()
+                if not ret:
+                    break
+                started = time.perf_counter()
+                rows = bikefit.process_frame_rows(frame)
+                # NaN rows mark frames without a detection
+                joint_rows, angle_row = rows if rows is not None else (np.nan, np.nan)
+                if frame_period:
+                    # Skip the frames that arrived while this one was analyzed
+                    skip = int((time.perf_counter() - started) / frame_period)
+                # Only the store is locked, so readers never wait on pose estimation
+                with self._lock:
+                    analysis.append(frame_number, joint_rows, angle_row)
+                frame_number += 1
+        finally:
+            video_capture.release()
+        return analysis
@@ -0,0 +1,71 @@
+import numpy as np
+
+from bikefit.analysis import ANGLE_NAMES, JOINT_NAMES, Analysis
+
+
+def _rows(value):
+    joints_row = np.full((len(JOINT_NAMES), 3), value, dtype=np.float32)
+    angles_row = np.full(len(ANGLE_NAMES), value, dtype=np.float32)
+    return joints_row, angles_row
+
+
+def test_append_grows_past_capacity():
+    analysis = Analysis.allocate(2)
+    for frame_number in range(3):
+        analysis.append(frame_number, *_rows(frame_number))
+
+    assert analysis.frame_count == 3
+    assert len(analysis.joints_xyv) == len(analysis.angle_values) == 4
+    for frame_number in range(3):
+        assert (analysis.joints_xyv[frame_number] == frame_number).all()
+        assert (analysis.angle_values[frame_number] == frame_number).all()
+    assert np.isnan(analysis.joints_xyv[3]).all()
+    assert np.isnan(analysis.angle_values[3]).all()
+
+
+def test_append_grows_to_a_frame_far_past_capacity():
+    analysis = Analysis.allocate(2)
+    analysis.append(0, *_rows(1))
+    analysis.append(9, *_rows(2))
+
+    assert len(analysis.joints_xyv) == 10
+    assert (analysis.joints_xyv[0] == 1).all()
+    assert np.isnan(analysis.joints_xyv[1:9]).all()
+    assert (analysis.joints_xyv[9] == 2).all()
+
+
+def test_nan_rows_are_left_out_of_dict_views():
+    analysis = Analysis.allocate(3)
+    analysis.append(0, *_rows(1))
+    analysis.append(1, *_rows(np.nan))
+    analysis.append(2, *_rows(2))
+
+    assert analysis.frame_count == 3
+    assert sorted(analysis.joints) == [0, 2]
+    assert sorted(analysis.angles) == [0, 2]
+    assert analysis.joints[2]["left_knee"] == (2.0, 2.0, 2.0)
+    assert analysis.angles[0] == dict.fromkeys(ANGLE_NAMES, 1.0)
+
+
+def test_update_on_default_analysis():
+    analysis = Analysis()
+    analysis.update(1, {"left_knee": (0.5, 0.25, 1.0)}, {"left_knee": 90.0})
+
+    assert analysis.frame_count == 1
+    assert analysis.joints == {1: {"left_knee": (0.5, 0.25, 1.0)}}
+    assert analysis.angles == {1: {"left_knee": 90.0}}
+
+
+def test_equality_compares_array_contents():
+    assert Analysis() == Analysis()
+    assert Analysis.allocate(2) == Analysis.allocate(2)
+
+    first, second = Analysis.allocate(2), Analysis.allocate(2)
+    first.append(0, *_rows(1))
+    second.append(0, *_rows(1))
+    assert first == second
+
+    second.append(1, *_rows(2))
+    assert first != second
+    first.append(1, *_rows(3))
+    assert first != second
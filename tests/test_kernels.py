@@ -0,0 +1,31 @@
+import numpy as np
+
+from bikefit._kernels import angles_batch
+
+
+def _reference_angle(a, b, c):
+    # The per-angle formula angles_batch replaced
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+    if angle > 180.0:
+        angle = 360 - angle
+    return angle
+
+
+def test_angles_batch_matches_reference_formula():
+    rng = np.random.default_rng(0)
+    a, b, c = rng.random((3, 1000, 2), dtype=np.float32)
+    out = angles_batch(a, b, c, np.empty(1000, dtype=np.float32))
+
+    expected = [_reference_angle(*points) for points in zip(a, b, c)]
+    np.testing.assert_allclose(out, expected, rtol=0, atol=5e-5)
+
+
+def test_angles_batch_wraps_reflex_angles():
+    # The raw difference of the two arctan2 is -243.43 degrees
+    a = np.array([[0.0, 1.0]], dtype=np.float32)
+    b = np.zeros((1, 2), dtype=np.float32)
+    c = np.array([[-1.0, -0.5]], dtype=np.float32)
+    out = angles_batch(a, b, c, np.empty(1, dtype=np.float32))
+
+    np.testing.assert_allclose(out, [116.56505], atol=5e-5)
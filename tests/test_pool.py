@@ -0,0 +1,125 @@
+import logging
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from bikefit import pool as pool_module
+from bikefit.analysis import ANGLE_NAMES, JOINT_NAMES
+from bikefit.bikefit import BikeFit
+from bikefit.pool import BikeFitPool
+
+FRAME_SIZE = (64, 48)
+
+
+def _write_clip(path, frame_count, fps=30.0):
+    # Uniform gray frames, frame i has value 5 * i; there is no one to detect
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, FRAME_SIZE)
+    for i in range(frame_count):
+        writer.write(np.full((FRAME_SIZE[1], FRAME_SIZE[0], 3), 5 * i, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+class _LiveCapture(cv2.VideoCapture):
+    # Reports the frame count the way cameras and network streams do
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return -1.0
+        return super().get(prop_id)
+
+
+@pytest.fixture
+def bikefit_pool():
+    bikefit_pool = BikeFitPool(n_workers=1, model_complexity=1)
+    yield bikefit_pool
+    bikefit_pool.close()
+
+
+def test_analyses_every_frame_of_a_clip(tmp_path, bikefit_pool):
+    video_path = _write_clip(tmp_path / "clip.avi", 10)
+    done = []
+    bikefit_pool.submit(video_path, lambda path, analysis: done.append((path, analysis)))
+    bikefit_pool.join()
+
+    assert len(done) == 1
+    path, analysis = done[0]
+    assert path == video_path
+    assert analysis.frame_count == 10
+    assert analysis.joints_xyv.shape == (10, len(JOINT_NAMES), 3)
+    assert analysis.angle_values.shape == (10, len(ANGLE_NAMES))
+    assert np.isnan(analysis.joints_xyv).all()
+    assert np.isnan(analysis.angle_values).all()
+
+
+def test_get_analysis_returns_a_copy(tmp_path, bikefit_pool):
+    video_path = _write_clip(tmp_path / "clip.avi", 5)
+    done = []
+    bikefit_pool.submit(video_path, lambda path, analysis: done.append(analysis))
+    bikefit_pool.join()
+
+    snapshot = bikefit_pool.get_analysis(video_path)
+    assert snapshot == done[0]
+    assert snapshot is not done[0]
+    snapshot.joints_xyv[:] = 0
+    snapshot.angle_values[:] = 0
+    assert np.isnan(bikefit_pool.get_analysis(video_path).joints_xyv).all()
+    assert np.isnan(bikefit_pool.get_analysis(video_path).angle_values).all()
+
+
+def test_missing_video_is_logged_without_callback(tmp_path, bikefit_pool, caplog):
+    video_path = str(tmp_path / "missing.avi")
+    done = []
+    with caplog.at_level(logging.ERROR, logger="bikefit.pool"):
+        bikefit_pool.submit(video_path, lambda path, analysis: done.append(analysis))
+        bikefit_pool.join()
+
+    assert done == []
+    assert bikefit_pool.get_analysis(video_path) is None
+    assert f"Failed to analyze {video_path}" in caplog.text
+
+
+def test_close_joins_the_workers():
+    bikefit_pool = BikeFitPool(n_workers=2, model_complexity=1)
+    bikefit_pool.close()
+
+    assert not any(worker.is_alive() for worker in bikefit_pool._workers)
+
+
+def test_unknown_frame_count_grows_the_analysis(tmp_path, bikefit_pool, monkeypatch):
+    monkeypatch.setattr(pool_module.cv2, "VideoCapture", _LiveCapture)
+    video_path = _write_clip(tmp_path / "clip.avi", 10)
+    bikefit_pool.submit(video_path)
+    bikefit_pool.join()
+
+    analysis = bikefit_pool.get_analysis(video_path)
+    assert analysis.frame_count == 10
+    assert len(analysis.joints_xyv) >= 10
+
+
+def test_realtime_skips_late_frames(tmp_path, monkeypatch):
+    def process_frame_rows(self, frame):
+        # Takes several frame periods and tags the rows with the frame number
+        time.sleep(0.005)
+        frame_number = round(frame.mean() / 5)
+        return (
+            np.full((len(JOINT_NAMES), 3), frame_number, dtype=np.float32),
+            np.full(len(ANGLE_NAMES), frame_number, dtype=np.float32),
+        )
+
+    monkeypatch.setattr(BikeFit, "process_frame_rows", process_frame_rows)
+    video_path = _write_clip(tmp_path / "clip.avi", 40, fps=1000.0)
+    bikefit_pool = BikeFitPool(n_workers=1, realtime=True, model_complexity=1)
+    try:
+        bikefit_pool.submit(video_path)
+        bikefit_pool.join()
+        analysis = bikefit_pool.get_analysis(video_path)
+    finally:
+        bikefit_pool.close()
+
+    analysed = np.flatnonzero(~np.isnan(analysis.angle_values[:, 0]))
+    assert analysis.frame_count == len(analysed) < len(analysis.angle_values) == 40
+    assert analysed[0] == 0
+    assert (analysis.angle_values[analysed] == analysed[:, None]).all()
+    assert (analysis.joints_xyv[analysed] == analysed[:, None, None]).all()